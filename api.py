@@ -2,24 +2,37 @@
 # NOTE: If the bot's framework winds up taking up more files than the
 # current 3 (this, `auth`, and `config`), it should probably be moved to
 # a `framework` subpackage.
-import json
-from json.decoder import JSONDecodeError
+import atexit
+from concurrent.futures import Future, ThreadPoolExecutor
+import functools
 import time
-from typing import Any, Callable, Literal, Optional
+import traceback
+from typing import Any, BinaryIO, Callable, Iterable, Literal, Optional
 
+import orjson
 import pywikibot as pwb
 from pywikibot import Page, Timestamp
+from pywikibot.site import APISite
 from requests import Response
+import requests.exceptions
+import urllib3.exceptions
 
 from classes import ZBError
 import config
 import constants
 
 _session = config.zb.session()
-# To avoid calling anew each time `getpage` is called.  Cached
-# regardless but still better to avoid repeat calls.
-_site = pwb.Site('en')
+_DISPATCH: dict[str, Callable[..., Response]] = {'get': _session.get,
+                                                 'post': _session.post}
 RequestParams = dict[str, object]
+# formatversion 2 drops the legacy {'*': ...} wrappers and, with utf8,
+# leaves non-ASCII text unescaped, for smaller and faster-to-parse
+# responses.  Any `errorformat` but 'bc' reports errors as a list under
+# 'errors' rather than a dict under 'error'.
+DEFAULT_PARAMS: RequestParams = {'format': 'json',
+                                 'formatversion': '2',
+                                 'utf8': '1',
+                                 'errorformat': 'plaintext'}
 # Awaiting resolution of <https://github.com/python/mypy/issues/731>.
 # Till then, best for base JSON functions to return Any while calling
 # functions and annotate specific return types.
@@ -28,6 +41,16 @@ TokenType = Literal[
     'createaccount', 'csrf', 'deleteglobalaccount', 'login', 'patrol',
     'rollback', 'setglobalaccountstatus', 'userrights', 'watch'
 ]
+# Tokens last the session's lifetime, so only fetch each type once
+# (and again if the API rejects it).
+_token_cache: dict[str, str] = {}
+_BAD_TOKEN_CODES = frozenset({'badtoken', 'notoken'})
+# Writes APIError logs off the raising thread.
+_err_pool = ThreadPoolExecutor(max_workers=1)
+# Existence results from `get_page` are trusted for this long.
+_EXISTS_TTL = 300  # seconds
+_exists_cache: dict[tuple[str, int], tuple[bool, float]] = {}
+_TITLES_PER_QUERY = 50  # MW's limit without apihighlimits.
 
 
 class APIError(Exception):
@@ -36,8 +59,8 @@ class APIError(Exception):
     def __init__(self, msg: str, event: object = None) -> None:
         """Saves MW API error content, if any is passed.
 
-        Saves to logs/APIError.json if JSON-serializable,
-        logs/APIError.txt otherwise.
+        The content is written in the background by `_write_error`, or
+        directly if the interpreter is shutting down.
 
         Args:
           msg:  A str to pass as Exception's arg.
@@ -47,11 +70,54 @@ class APIError(Exception):
         super().__init__(msg)
         if event:
             try:
-                with open("logs/APIError.json", 'w', encoding='utf-8') as f:
-                    json.dump(event, f)
-            except TypeError:
-                with open("logs/APIError.txt", 'w', encoding='utf-8') as f:
-                    f.write(str(event))
+                future = _err_pool.submit(_write_error, event)
+            except RuntimeError:  # Pool already shut down.
+                _write_error(event)
+            else:
+                future.add_done_callback(_report_write_error)
+
+
+def _report_write_error(future: Future[None]) -> None:
+    """Report an exception raised by `_write_error`, if any.
+
+    Otherwise it would be lost in the Future, which nothing reads.
+    """
+    if (e := future.exception()) is not None:
+        traceback.print_exception(type(e), e, e.__traceback__)
+
+
+def _write_error(event: object) -> None:
+    """Append API error content as a line of logs/APIError.ndjson.
+
+    Writes the content itself if JSON-serializable, as a JSON string
+    otherwise:  decoded if bytes (e.g. a raw Response body), its str if
+    anything else.
+    """
+    try:
+        line = orjson.dumps(event)
+    except TypeError:
+        if isinstance(event, bytes):
+            line = orjson.dumps(event.decode('utf-8', 'replace'))
+        else:
+            line = orjson.dumps(str(event))
+    f = _error_log()
+    f.write(line + b"\n")
+    # On the worker thread, so costs the raising thread nothing, and
+    # atexit (which would otherwise flush) doesn't run on SIGKILL.
+    f.flush()
+
+
+@functools.cache
+def _error_log() -> BinaryIO:
+    """Open the APIError log once, on first use, for the process's life."""
+    # pylint: disable-next=consider-using-with
+    f = open("logs/APIError.ndjson", 'ab', buffering=1 << 16)
+    atexit.register(f.close)
+    return f
+
+
+class BadTokenError(APIError):
+    """Exception raised when the API rejects the token passed to it."""
 
 
 class NoTokenError(ZBError):
@@ -72,40 +138,99 @@ def _request(methodname: Literal['get', 'post'],
     constant in this module.
 
     Args:
-      method:  A str matching the name of a method that an OAuth1Session
-        can have.
-      **kwargs:  Keyword arguments to pass to `method`.
+      methodname:  'get' or 'post', looked up in `_DISPATCH`.
+      params:  Query-string params.
+      data:  Form-encoded body params.
 
     Returns:
       An object matching the JSON structure of the relevant API
       Response.
 
     Raises:
-      requests.HTTPError:  Issue connecting with API.
-      APIError from JSONDecodeError:  API Response output was not
+      requests.RequestException:  Issue connecting with API or reading
+        its Response (see `_read`).
+      APIError from orjson.JSONDecodeError:  API Response output was not
         decodable JSON.
-      APIError (native):  API Response included a status > 400 or an
-        'error' field in its JSON.
+      BadTokenError:  API Response's errors indicated a bad or missing
+        token.
+      APIError (native):  API Response included a status >= 400 or an
+        'error'/'errors' field in its JSON.
     """
     params = params or {}
-    method: Callable[..., Response] = getattr(_session, methodname)
-    # Can raise requests.HTTPError
-    response = method(constants.API_URL, params=params, data=data)
-    if not response:  # status code > 400
-        raise APIError(f"{response.status_code=}", response.content)
+    method = _DISPATCH[methodname]
+    # Streamed so the body is read once, straight from the socket,
+    # rather than via `Response.content`.
+    with method(constants.API_URL, params=params, data=data,
+                stream=True) as response:
+        body = _read(response)
+    if response.status_code >= 400:
+        raise APIError(f"{response.status_code=}", body)
+    return decode_response(body)
+
+
+def _read(response: Response) -> bytes:
+    """Read a streamed Response's body, as `Response.content` would.
+
+    Reading `raw` skips the exception wrapping `requests` otherwise
+    does, so this redoes it.
+
+    Raises:
+      requests.exceptions.ChunkedEncodingError:  Body was truncated.
+      requests.exceptions.ContentDecodingError:  Body could not be
+        decompressed.
+      requests.exceptions.ReadTimeout:  Read timed out.
+      requests.exceptions.SSLError:  TLS error while reading.
+      requests.exceptions.ConnectionError:  Other connection issue.
+    """
+    try:
+        body: bytes = response.raw.read(decode_content=True)
+    except urllib3.exceptions.ProtocolError as e:
+        raise requests.exceptions.ChunkedEncodingError(e) from e
+    except urllib3.exceptions.DecodeError as e:
+        raise requests.exceptions.ContentDecodingError(e) from e
+    except urllib3.exceptions.ReadTimeoutError as e:
+        raise requests.exceptions.ReadTimeout(e) from e
+    except urllib3.exceptions.SSLError as e:
+        raise requests.exceptions.SSLError(e) from e
+    except urllib3.exceptions.HTTPError as e:
+        raise requests.exceptions.ConnectionError(e) from e
+    return body
+
+
+def decode_response(content: bytes) -> Any:
+    """JSON conversion and error check for API Response content.
+
+    Shared with `async_api`, whose client returns different Response
+    objects but the same content.
+
+    Arg:
+      content:  The raw bytes of an API Response's body.
+
+    Returns:
+      An object matching the JSON structure of the content.
+
+    Raises:
+      See `_request` documentation.
+    """
     try:
-        response_data = response.json()
-    except JSONDecodeError as e:
-        raise APIError("No JSON found.", response.content) from e
-    if 'error' in response_data:
-        raise APIError("'error' field in response.", response_data)
+        response_data = orjson.loads(content)
+    except orjson.JSONDecodeError as e:
+        raise APIError("No JSON found.", content) from e
+    errors = response_data.get('errors', [])
+    if 'error' in response_data:  # If `errorformat` overridden to 'bc'.
+        errors.append(response_data['error'])
+    if errors:
+        if any(i.get('code') in _BAD_TOKEN_CODES for i in errors):
+            raise BadTokenError("Token rejected.", response_data)
+        raise APIError("Error(s) in response.", response_data)
     return response_data
 
 
 def get(params: RequestParams) -> Any:
     """Send GET request within the OAuth-signed session.
 
-    Automatically specifies output in JSON (overridable).
+    Automatically specifies output in JSON, formatversion 2
+    (overridable).
 
     Arg:
       params:  Params to supplement/override the default ones.
@@ -113,15 +238,16 @@ def get(params: RequestParams) -> Any:
     Returns / Raises:
       See `_request` documentation.
     """
-    return _request('get', params={'format': 'json', **params})
+    return _request('get', params=DEFAULT_PARAMS | params)
 
 
 def post(params: RequestParams, tokentype: TokenType = 'csrf') -> Any:
     """Send POST request within the OAuth-signed session.
 
-    Automatically specifies output in JSON (overridable), and sets the
-    request's body (a CSRF token) through a `get_token` call defaulting
-    to 'csrf'.
+    Automatically specifies output in JSON, formatversion 2
+    (overridable), and sets the request's body (a CSRF token) through a
+    `get_token` call defaulting to 'csrf'.  If the API rejects the
+    (cached) token, retries once with a fresh one.
 
     Sleeps for 10 seconds after receiving response.
 
@@ -136,19 +262,25 @@ def post(params: RequestParams, tokentype: TokenType = 'csrf') -> Any:
     Returns / Raises:
       See `_request` documentation.
     """
-    response = _request(
-        'post',
-        data={'format': 'json',
-              'token': get_token(tokentype),
-              **params}
-    )
+    try:
+        response = _request('post', data=_post_data(params, tokentype))
+    except BadTokenError:
+        forget_token(tokentype)
+        response = _request('post', data=_post_data(params, tokentype))
     time.sleep(10)
     return response
 
 
+def _post_data(params: RequestParams, tokentype: TokenType) -> RequestParams:
+    return {**DEFAULT_PARAMS, 'token': get_token(tokentype), **params}
+
+
 def get_token(tokentype: TokenType = 'csrf') -> str:
     R"""Request a token (CSRF by default) from the MediaWiki API.
 
+    Tokens are cached per type; only the first call for each type
+    queries the API.
+
     Args:
     tokentype:  A TokenType.  Defaults to 'csrf' like the MW API.
 
@@ -159,9 +291,40 @@ def get_token(tokentype: TokenType = 'csrf') -> str:
       APIError from KeyError:  If the query response has no token field.
       NoTokenError:  If the token field is "empty" (just "+\\")
     """
+    if (token := cached_token(tokentype)) is not None:
+        return token
     query = get({'action': 'query',
                  'meta': 'tokens',
                  'type': tokentype})
+    return cache_token(query, tokentype)
+
+
+def cached_token(tokentype: TokenType) -> Optional[str]:
+    """Get a cached token of type `tokentype`, or None if there is none.
+
+    The cache is shared with `async_api`.
+    """
+    return _token_cache.get(tokentype)
+
+
+def forget_token(tokentype: TokenType) -> None:
+    """Drop the cached token of type `tokentype`, if any."""
+    _token_cache.pop(tokentype, None)
+
+
+def cache_token(query: Any, tokentype: TokenType) -> str:
+    R"""Pull a token out of a meta=tokens query and cache it.
+
+    Args:
+      query:  The JSON of a meta=tokens query's Response.
+      tokentype:  The TokenType that was queried.
+
+    Returns:
+      The token, as a str.
+
+    Raises:
+      See `get_token` documentation.
+    """
     try:
         # How MW names all tokens:
         token: str = query['query']['tokens'][f'{tokentype}token']
@@ -169,17 +332,30 @@ def get_token(tokentype: TokenType = 'csrf') -> str:
         raise APIError("No token obtained.", query) from e
     if token == R"+\\":
         raise NoTokenError("Empty token.")
+    _token_cache[tokentype] = token
     return token
 
 
-def get_page(title: str, ns: int = 0, must_exist: bool = False) -> Page:
+def get_page(title: str,
+             ns: int = 0,
+             must_exist: bool = False,
+             cached: bool = True) -> Page:
     """Wrapper for Page(), with optional existence check.
 
     Does not guarantee that page actually exists; check with .exists().
 
+    Pages are memoized by title and namespace, so repeat calls share
+    one Page (and thus its loaded text), and existence checks are
+    cached for `_EXISTS_TTL` seconds.  Use `clear_page_cache` to drop
+    both.
+
     Args:
       title:  A str matching a valid wikipage title.
       ns:  An int of the MW-defined number for the page's namespace.
+      must_exist:  A bool of whether to raise if the page doesn't
+        exist.
+      cached:  A bool; if False, bypass the memoized Page, e.g. for a
+        page the bot itself edits.
 
     Returns:
       A Page with title `title` in namespace with number `ns`, possibly
@@ -188,12 +364,84 @@ def get_page(title: str, ns: int = 0, must_exist: bool = False) -> Page:
     Raises:
       PageNotFoundError:  If `must_exist` but the page does not exist.
     """
-    page = Page(_site, title=title, ns=ns)
-    if must_exist and not page.exists():
+    if cached:
+        page = _get_page(title, ns)
+    else:
+        page = Page(_get_site(), title=title, ns=ns)
+    if must_exist and not _page_exists(page, (title, ns)):
         raise PageNotFoundError("Page does not exist")
     return page
 
 
+@functools.lru_cache(maxsize=4096)
+def _get_page(title: str, ns: int) -> Page:
+    return Page(_get_site(), title=title, ns=ns)
+
+
+def _page_exists(page: Page, key: tuple[str, int]) -> bool:
+    now = time.monotonic()
+    exists, checked = _exists_cache.get(key, (False, -_EXISTS_TTL))
+    if now - checked >= _EXISTS_TTL:
+        exists = page.exists()
+        _exists_cache[key] = exists, now
+    return exists
+
+
+def get_pages(titles: Iterable[str], ns: int = 0) -> dict[str, Page]:
+    """Batch counterpart to `get_page`.
+
+    Checks existence for all titles at once through `prefetch`, so that
+    `get_page(..., must_exist=True)` on any of them needs no further
+    API calls while the result is cached.
+
+    Args:
+      titles:  An iterable of strs matching valid wikipage titles.
+      ns:  An int of the MW-defined number for the pages' namespace.
+
+    Returns:
+      A dict mapping each title to a Page, possibly nonexistent.
+    """
+    titles = list(titles)
+    prefetch(titles, ns)
+    return {title: _get_page(title, ns) for title in titles}
+
+
+def prefetch(titles: Iterable[str], ns: int = 0) -> None:
+    """Cache existence of many pages in one query per 50 titles.
+
+    Args:
+      See `get_pages`.
+    """
+    # Key by the Page's full title, as that's what the API returns.
+    keys = {_get_page(title, ns).title(): (title, ns) for title in titles}
+    full_titles = list(keys)
+    for i in range(0, len(full_titles), _TITLES_PER_QUERY):
+        query = get({'action': 'query',
+                     'prop': 'info',
+                     'titles': '|'.join(
+                         full_titles[i:i + _TITLES_PER_QUERY]
+                     )})['query']
+        now = time.monotonic()
+        normalized = {j['to']: j['from'] for j in query.get('normalized', [])}
+        for info in query['pages']:
+            key = keys.get(normalized.get(info['title'], info['title']))
+            if key is not None:
+                exists = 'missing' not in info and 'invalid' not in info
+                _exists_cache[key] = exists, now
+
+
+def clear_page_cache() -> None:
+    """Forget memoized Pages and existence checks from `get_page`."""
+    _get_page.cache_clear()
+    _exists_cache.clear()
+
+
+@functools.cache
+def _get_site() -> APISite:
+    """Get the PWB site on first use, rather than at import."""
+    return pwb.Site('en')
+
+
 def site_time() -> Timestamp:
     """Wrapper for site server time."""
-    return _site.server_time()
+    return _get_site().server_time()
@@ -0,0 +1,148 @@
+"""Asynchronous counterparts to the MW API functions in `api`.
+
+All requests must be made inside `session`, which opens the client
+(and closes it afterward) within the running event loop.  There,
+independent reads can be run concurrently (e.g. through
+`asyncio.gather`), multiplexed over a single HTTP/2 connection.  Writes
+are still made one at a time, 10 seconds apart, as in `api`.
+Response decoding and the token cache are shared with `api`.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, Literal, Optional
+
+import httpx
+
+import api
+from api import (DEFAULT_PARAMS, APIError, BadTokenError, RequestParams,
+                 TokenType)
+from classes import ZBError
+import config
+import constants
+
+# The client, and a lock held across each write and its post-write
+# sleep (to keep `api`'s edit rate however many `post`s are gathered).
+# Both belong to the event loop they were made in, so are set per
+# `session` rather than at import.
+_session: ContextVar[tuple[httpx.AsyncClient, asyncio.Lock]] = ContextVar(
+    '_session'
+)
+
+
+class NoSessionError(ZBError):
+    """Exception raised when a request is made outside `session`."""
+
+
+@asynccontextmanager
+async def session() -> AsyncGenerator[None, None]:
+    """Async context manager within which to make requests.
+
+    Opens an OAuth-signed client for the current event loop, closing it
+    on exit.  Tasks started inside (e.g. by `asyncio.gather`) share it.
+    """
+    async with config.zb.async_client() as client:
+        token = _session.set((client, asyncio.Lock()))
+        try:
+            yield
+        finally:
+            _session.reset(token)
+
+
+def _current() -> tuple[httpx.AsyncClient, asyncio.Lock]:
+    try:
+        return _session.get()
+    except LookupError as e:
+        raise NoSessionError("async_api used outside `session`.") from e
+
+
+def _encode(params: Optional[RequestParams]) -> dict[str, str]:
+    # Stringify values as `requests` does for the sync API.
+    return {k: str(v) for k, v in (params or {}).items()}
+
+
+async def _request(methodname: Literal['get', 'post'],
+                   params: Optional[RequestParams] = None,
+                   data: Optional[RequestParams] = None) -> Any:
+    """Error handling and JSON conversion for async API functions.
+
+    Async counterpart to `api._request`, routing requests through the
+    current `session`'s client, which is built from the same
+    auth.Authorization.
+
+    Args:
+      methodname:  'get' or 'post'.
+      params:  Query-string params.
+      data:  Form-encoded body params.
+
+    Returns:
+      An object matching the JSON structure of the relevant API
+      Response.
+
+    Raises:
+      NoSessionError:  Called outside `session`.
+      httpx.HTTPError:  Issue connecting with API.
+      APIError from orjson.JSONDecodeError:  API Response output was not
+        decodable JSON.
+      BadTokenError:  API Response's errors indicated a bad or missing
+        token.
+      APIError (native):  API Response included a status >= 400 or an
+        'error'/'errors' field in its JSON.
+    """
+    client, _ = _current()
+    response = await client.request(methodname.upper(),
+                                    constants.API_URL,
+                                    params=_encode(params),
+                                    data=_encode(data))
+    if response.status_code >= 400:
+        raise APIError(f"{response.status_code=}", response.content)
+    return api.decode_response(response.content)
+
+
+async def get(params: RequestParams) -> Any:
+    """Send GET request through the OAuth-signed async client.
+
+    See `api.get`.
+    """
+    return await _request('get', params=DEFAULT_PARAMS | params)
+
+
+async def post(params: RequestParams, tokentype: TokenType = 'csrf') -> Any:
+    """Send POST request through the OAuth-signed async client.
+
+    See `api.post`.  Posts wait on each other, including the 10-second
+    sleep after each response, but not on `get`s, which proceed in the
+    meantime.
+    """
+    _, write_lock = _current()
+    async with write_lock:
+        try:
+            response = await _request(
+                'post', data=await _post_data(params, tokentype)
+            )
+        except BadTokenError:
+            api.forget_token(tokentype)
+            response = await _request(
+                'post', data=await _post_data(params, tokentype)
+            )
+        await asyncio.sleep(10)
+    return response
+
+
+async def _post_data(params: RequestParams,
+                     tokentype: TokenType) -> RequestParams:
+    return {**DEFAULT_PARAMS, 'token': await get_token(tokentype),
+            **params}
+
+
+async def get_token(tokentype: TokenType = 'csrf') -> str:
+    """Request a token (CSRF by default) from the MediaWiki API.
+
+    See `api.get_token`.
+    """
+    if (token := api.cached_token(tokentype)) is not None:
+        return token
+    query = await get({'action': 'query',
+                       'meta': 'tokens',
+                       'type': tokentype})
+    return api.cache_token(query, tokentype)
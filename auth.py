@@ -1,7 +1,47 @@
 """Authorization class, to be called privately from `config`."""
 from dataclasses import dataclass
+from typing import Generator
 
+import httpx
+from oauthlib.oauth1 import Client
+from requests.adapters import HTTPAdapter
 from requests_oauthlib import OAuth1Session
+from urllib3.util import Retry
+
+import constants
+
+# Once retries run out, hand back the last response rather than raising
+# RetryError, so that `api._request` turns it into an APIError.
+_RETRY = Retry(total=3,
+               backoff_factor=0.2,
+               status_forcelist=[429, 500, 502, 503, 504],
+               raise_on_status=False)
+_FORM_CONTENT_TYPE = 'application/x-www-form-urlencoded'
+
+
+class _OAuth1Auth(httpx.Auth):
+    """httpx counterpart to the signing done by OAuth1Session."""
+    requires_request_body = True
+
+    def __init__(self, client: Client) -> None:
+        self._client = client
+
+    def auth_flow(
+        self, request: httpx.Request
+    ) -> Generator[httpx.Request, httpx.Response, None]:
+        # Form-encoded bodies are part of the OAuth1 signature base.
+        content_type = request.headers.get('Content-Type', '')
+        if request.content and content_type.startswith(_FORM_CONTENT_TYPE):
+            _, headers, _ = self._client.sign(
+                str(request.url), request.method,
+                body=request.content.decode('utf-8'),
+                headers={'Content-Type': content_type}
+            )
+        else:
+            _, headers, _ = self._client.sign(str(request.url),
+                                              request.method)
+        request.headers['Authorization'] = headers['Authorization']
+        yield request
 
 
 @dataclass
@@ -24,8 +64,42 @@ class Authorization:
         return f"<Authorization object with access key {self.access_key}>"
 
     def session(self) -> OAuth1Session:
-        """Create OAuth1Session using instance data attributes."""
-        return OAuth1Session(self.client_key,
-                             client_secret=self.client_secret,
-                             resource_owner_key=self.access_key,
-                             resource_owner_secret=self.access_secret)
+        """Create OAuth1Session using instance data attributes.
+
+        Mounts a keep-alive connection pool with retries on transient
+        server errors, so that the session reuses its TCP/TLS connection
+        across API calls, and asks for compressed responses.
+        """
+        session = OAuth1Session(self.client_key,
+                                client_secret=self.client_secret,
+                                resource_owner_key=self.access_key,
+                                resource_owner_secret=self.access_secret)
+        # One host (the MW API), so one pool; kept large enough that
+        # concurrent callers don't block waiting on a connection.
+        adapter = HTTPAdapter(pool_connections=1,
+                              pool_maxsize=32,
+                              pool_block=False,
+                              max_retries=_RETRY)
+        session.mount("https://", adapter)
+        session.headers.update(constants.HEADERS)
+        session.headers['Connection'] = 'keep-alive'
+        return session
+
+    def async_client(self) -> httpx.AsyncClient:
+        """Create HTTP/2 httpx.AsyncClient using instance data attributes.
+
+        Requests are OAuth1-signed like those of `session`, and share a
+        keep-alive pool so concurrent calls multiplex over one
+        connection.
+        """
+        client = Client(self.client_key,
+                        client_secret=self.client_secret,
+                        resource_owner_key=self.access_key,
+                        resource_owner_secret=self.access_secret)
+        return httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=100,
+                                max_keepalive_connections=20),
+            auth=_OAuth1Auth(client),
+            headers=constants.HEADERS
+        )
@@ -1,4 +1,10 @@
 """Holds constant values."""
+from urllib3.util import make_headers
 
 API_URL = "https://en.wikipedia.org/w/api.php?"
 WIKI_URL = "https://en.wikipedia.org/wiki/"
+USER_AGENT = ("zinbot (https://en.wikipedia.org/wiki/User:%27zinbot; "
+              "coding@tamz.in)")
+# Only advertises br if `brotli` is importable, i.e. if urllib3/httpx
+# can decode it.
+HEADERS = make_headers(accept_encoding=True) | {'User-Agent': USER_AGENT}
@@ -1,9 +1,18 @@
-"""Logging features."""
+"""Logging features.
+
+Both local and on-wiki logging are batched:  events are queued and
+written out once enough have built up, as well as by `flush` at the
+end of each run.  Only local logs are also flushed on exit; on-wiki logs
+are never edited from an exit handler.
+"""
+import atexit
+from collections import defaultdict
 from contextlib import contextmanager
 import datetime as dt
 from enum import Enum
 import json
 from typing import Any, Generator
+import weakref
 
 from pywikibot import Timestamp
 
@@ -12,12 +21,19 @@ import constants
 from classes import Event, Namespace, SensitiveDict, SensitiveList, Title
 
 LoggerData = SensitiveDict[str, SensitiveList[Event]]
+# Message, page, timestamp, date logged, and formatters.
+PendingEvent = tuple[Enum, str, Timestamp, str, dict[str, Any]]
+
+_LOCAL_BATCH_SIZE = 50
+_pending: defaultdict[str, list[str]] = defaultdict(list)
+_onwiki_loggers: weakref.WeakSet['OnWikiLogger'] = weakref.WeakSet()
 
 
 class OnWikiLogger:
     """Controls on-wiki logging of events."""
     _dateformat = "%Y-%m-%d"
     _timestampformat = "%H:%M:%S %Y-%m-%d (UTC)"
+    _batch_size = 10
 
     def __init__(
         self,
@@ -36,6 +52,8 @@ class OnWikiLogger:
         self._ns_and_basepage = ns_and_basepage
         self._logtitle = Title(ns_and_basepage[0],
                                ns_and_basepage[1] + logpage)
+        self._pending: list[PendingEvent] = []
+        _onwiki_loggers.add(self)
 
     def __repr__(self) -> str:
         return f"Logger({self._logpage}, {self._ns_and_basepage})"
@@ -56,7 +74,8 @@ class OnWikiLogger:
 
     def _load_json(self) -> LoggerData:
         text = api.get_page(self._logtitle.pagename,
-                            self._logtitle.namespace).text
+                            self._logtitle.namespace,
+                            cached=False).text
         return SensitiveDict({k: SensitiveList(v)
                               for k, v in json.loads(text).items()})
 
@@ -70,12 +89,20 @@ class OnWikiLogger:
     def edit(self, summary: str) -> Generator[LoggerData, None, None]:
         """Context manager for editing the log.
 
+        Flushes any queued events first, so they aren't overwritten.
+
         Arg:
           summary:  A str to use as the edit summary when saving.
 
         Yields:
           A generator of LoggerData.
         """
+        self.flush()
+        with self._edit(summary) as data:
+            yield data
+
+    @contextmanager
+    def _edit(self, summary: str) -> Generator[LoggerData, None, None]:
         data = self._load_json()
         try:
             yield data
@@ -88,7 +115,9 @@ class OnWikiLogger:
             page: str,
             timestamp: Timestamp,
             **formatters: Any) -> None:
-        """Log an event.
+        """Queue an event to be logged.
+
+        Queued events are saved together, in one edit, by `flush`.
 
         Arg:
           message:  An Enum, the name of which can serve as an error
@@ -99,26 +128,62 @@ class OnWikiLogger:
           **formatters:  Objects to pass to the Enum's value for
             formatting.
         """
-        with self.edit(f"Logging [[{page}]] (code {message.name})") as data:
-            if page in [i['page'] for day in data.values() for i in day]:
-                return  # Skip if already logged.
-            now = api.site_time().strftime(self._dateformat)
-            if now not in data:
-                data[now] = SensitiveList([])
-            data[now].append({
-                'page': page,
-                'code': message.name,
-                'message': message.value.format(page=page, **formatters),
-                'timestamp': timestamp.strftime(self._timestampformat)
-            })
+        now = api.site_time().strftime(self._dateformat)
+        self._pending.append((message, page, timestamp, now, formatters))
+        if len(self._pending) >= self._batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Save all queued events to the log in a single edit."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        if len(pending) == 1:
+            message, page, *_ = pending[0]
+            summary = f"Logging [[{page}]] (code {message.name})"
+        else:
+            summary = f"Logging {len(pending)} events"
+        with self._edit(summary) as data:
+            for message, page, timestamp, now, formatters in pending:
+                if page in [i['page'] for day in data.values() for i in day]:
+                    continue  # Skip if already logged.
+                if now not in data:
+                    data[now] = SensitiveList([])
+                data[now].append({
+                    'page': page,
+                    'code': message.name,
+                    'message': message.value.format(page=page, **formatters),
+                    'timestamp': timestamp.strftime(self._timestampformat)
+                })
 
 
 def log_local(title: Title, logfile: str) -> None:
-    """Append a page's title and URL to a document in folder `logs/`.
+    """Queue a page's title and URL for a document in folder `logs/`.
+
+    Queued lines are appended by `flush_local`.
 
     Args:
       title:  A str of a title that should be logged.
       logfile:  A file (extant or not) in folder `logs/`.
     """
-    with open(f"logs/{logfile}", 'a', encoding='utf-8') as f:
-        f.write(f"{title} <{constants.WIKI_URL}{title.as_url}>\n")
+    _pending[logfile].append(f"{title} <{constants.WIKI_URL}{title.as_url}>\n")
+    if sum(map(len, _pending.values())) >= _LOCAL_BATCH_SIZE:
+        flush_local()
+
+
+def flush_local() -> None:
+    """Append all queued lines to their files, one write per file."""
+    for logfile, lines in _pending.items():
+        with open(f"logs/{logfile}", 'a', encoding='utf-8') as f:
+            f.write("".join(lines))
+    _pending.clear()
+
+
+def flush() -> None:
+    """Write out everything queued, locally and on-wiki."""
+    flush_local()
+    for logger in list(_onwiki_loggers):
+        logger.flush()
+
+
+atexit.register(flush_local)
@@ -7,12 +7,16 @@ __version__ = "1.4.2"
 
 import time
 
+import api
+import logging_
 import pagetriage.newpages
 
 
 def run() -> None:
     """Run the bot's tasks that are currently approved / in trial."""
+    api.clear_page_cache()  # Pages may have changed since last run.
     pagetriage.newpages.checkqueue()  # trial
+    logging_.flush()
 
 
 if __name__ == "__main__":